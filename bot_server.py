@@ -13,6 +13,8 @@ from datetime import datetime
 from dotenv import load_dotenv
 from filelock import FileLock
 
+from site_adapters import check_stock, format_result, stats_summary
+
 load_dotenv()
 app = Flask(__name__)
 
@@ -132,10 +134,9 @@ def get_product_name(url: str) -> str:
 def check_stock_once(url: str) -> bool:
     """立刻請求網站檢查是否有貨"""
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        return "缺貨" not in soup.get_text()
+        result = check_stock(url)
+        print(f"📊 {format_result(result)}")
+        return result["in_stock"]
     except Exception as e:
         print(f"⚠️ 檢查庫存失敗：{url} -> {e}")
         return False
@@ -347,6 +348,19 @@ def handle_message(event):
         line_bot_api.reply_message(event.reply_token, TextSendMessage(text=reply))
         return
 
+    # ==================================================
+    # 5) adapter 統計 / stats
+    #    這個 bot_server process 啟動以來各站的流量 / parse 時間
+    # ==================================================
+    if cmd in ("統計", "stats"):
+        summary = stats_summary()
+        reply = (
+            f"📊 adapter 統計：\n\n{summary}" if summary
+            else "目前還沒有任何檢查紀錄。"
+        )
+        line_bot_api.reply_message(event.reply_token, TextSendMessage(text=reply))
+        return
+
     # ==================================================
     # 其他訊息 -> 顯示幫助
     # ==================================================
@@ -355,7 +369,8 @@ def handle_message(event):
         "📦 庫存 / stock  → 立即重查所有庫存\n"
         "📄 列出監控 / 監控 / list  → 顯示監控清單與狀態\n"
         "➕ 新增 [URL] [秒數] / add [URL] [秒數]  (未輸入秒數預設3分鐘)\n"
-        "➖ 移除 [URL] / remove [URL]"
+        "➖ 移除 [URL] / remove [URL]\n"
+        "📊 統計 / stats  → 各站檢查流量與 parse 時間"
     )
 
     line_bot_api.reply_message(event.reply_token, TextSendMessage(text=help_text))
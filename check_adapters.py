@@ -0,0 +1,212 @@
+import os
+import sys
+import gzip
+import zlib
+import threading
+import http.server
+
+import site_adapters
+from site_adapters import (
+    FetchError,
+    check_stock,
+    decode_body,
+    fixture_fetcher,
+    format_result,
+    http_fetch,
+)
+
+# ------------------------------------------------------
+# 用 fixtures/ 離線驗證 site adapter：python check_adapters.py
+# 任何一項失敗就 exit 1（不用 assert，python -O 也照樣檢查）
+#
+# 目前的 fixture 是照 Costco OCC API / 商品頁的格式手工做的
+# （開發環境連不到 costco.com.tw），之後能連線時請換成實際錄下來的回應，
+# 檔名照 <source>.*：costco_api.json、html.html
+# ------------------------------------------------------
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+COSTCO_URL = (
+    "https://www.costco.com.tw/Digital-Mobile/Mobile-Tablets/"
+    "iPhone-Mobile-Phones/Apple-iPhone-17-512GB-Black/p/158010"
+)
+GENERIC_URL = "https://shop.example.com/item/1"
+
+# (fixture 子目錄, 商品網址, 預期 adapter, 預期有貨, 預期回答的來源, 有抓到的 fixture 檔)
+CASES = [
+    # OCC API 直接回答
+    ("costco_tw/api_in_stock", COSTCO_URL, "costco_tw", True, "costco_api", ["costco_api.json"]),
+    ("costco_tw/api_out_of_stock", COSTCO_URL, "costco_tw", False, "costco_api", ["costco_api.json"]),
+    # API 回傳格式不對 -> 退回 HTML
+    ("costco_tw/api_malformed", COSTCO_URL, "costco_tw", True, "html", ["costco_api.json", "html.html"]),
+    # 以下 API 都抓不到；JSON-LD 和頁面文字不一致，看是哪一條路決定的
+    # JSON-LD OutOfStock，頁面沒有「缺貨」字樣 -> JSON-LD 決定
+    ("costco_tw/jsonld_out_of_stock", COSTCO_URL, "costco_tw", False, "html", ["html.html"]),
+    # JSON-LD InStock，推薦商品區塊有「缺貨」 -> JSON-LD 決定
+    ("costco_tw/jsonld_in_stock_text_out", COSTCO_URL, "costco_tw", True, "html", ["html.html"]),
+    # JSON-LD InStoreOnly 不算有貨 -> 交給文字判斷（有「缺貨」）
+    ("costco_tw/jsonld_in_store_only", COSTCO_URL, "costco_tw", False, "html", ["html.html"]),
+    # 沒有 JSON-LD -> 文字判斷
+    ("costco_tw/no_jsonld", COSTCO_URL, "costco_tw", False, "html", ["html.html"]),
+    # 其他網站：只有 HTML 文字判斷，編碼照 <meta charset>
+    ("generic/utf8_in_stock", GENERIC_URL, "generic", True, "html", ["html.html"]),
+    ("generic/utf8_out_of_stock", GENERIC_URL, "generic", False, "html", ["html.html"]),
+    ("generic/big5_out_of_stock", GENERIC_URL, "generic", False, "html", ["html.html"]),
+]
+
+
+def check(cond: bool, msg):
+    if not cond:
+        raise AssertionError(msg)
+
+
+# ------------------------------------------------------
+# fixture：整條 check_stock 流程
+# ------------------------------------------------------
+def run_case(subdir: str, url: str, adapter: str, expected: bool, source: str, files: list):
+    # 每個 case 獨立，不受前面 case 觸發的斷路器影響
+    site_adapters.SOURCE_STATE.clear()
+
+    path = os.path.join(FIXTURE_DIR, subdir)
+    result = check_stock(url, fetch=fixture_fetcher(path))
+    expected_bytes = sum(os.path.getsize(os.path.join(path, f)) for f in files)
+
+    check(result["adapter"] == adapter, result)
+    check(result["source"] == source, result)
+    check(result["in_stock"] is expected, result)
+    check(result["bytes"] == expected_bytes, (result["bytes"], expected_bytes))
+    return format_result(result)
+
+
+# ------------------------------------------------------
+# decode_body：解壓與不支援的編碼
+# ------------------------------------------------------
+def check_decode_body():
+    body = "<p>缺貨</p>".encode()
+    raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw_deflate = raw_deflate.compress(body) + raw_deflate.flush()
+
+    check(decode_body(gzip.compress(body), "gzip") == body, "gzip")
+    check(decode_body(zlib.compress(body), "deflate") == body, "deflate (zlib)")
+    check(decode_body(raw_deflate, "deflate") == body, "deflate (raw)")
+    check(decode_body(gzip.compress(gzip.compress(body)), "gzip, gzip") == body, "gzip, gzip")
+    check(decode_body(body, None) == body, "identity")
+    try:
+        decode_body(body, "br")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("br 應該要失敗")
+    return "gzip / deflate / gzip, gzip / br"
+
+
+# ------------------------------------------------------
+# http_fetch：對本機 server 量傳輸位元組數（應該是壓縮後大小）
+# ------------------------------------------------------
+PAGE = ("<html><body>" + "目前缺貨" * 500 + "</body></html>").encode()
+BIG5_PAGE = "<html><body>缺貨</body></html>".encode("big5")
+
+# path -> (status, Content-Encoding, Content-Type, 傳出去的 body, 是否 chunked)
+RESPONSES = {
+    "/gzip": (200, "gzip", "text/html; charset=utf-8", gzip.compress(PAGE), False),
+    "/deflate": (200, "deflate", "text/html; charset=utf-8", zlib.compress(PAGE), True),
+    "/big5": (200, None, "text/html; charset=Big5", BIG5_PAGE, False),
+    "/br": (200, "br", "text/html; charset=utf-8", b"\x1b\x00\x00not-really-brotli", False),
+    "/forbidden": (403, None, "text/html", b"<h1>Access Denied</h1>" * 10, False),
+}
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, encoding, content_type, body, chunked = RESPONSES[self.path]
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(body), body))
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def check_http_fetch():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for path in ("/gzip", "/deflate"):
+            body, transferred, charset = http_fetch("html", base + path)
+            check(body == PAGE, f"{path} 解壓結果不對")
+            check(transferred == len(RESPONSES[path][3]), (path, transferred))
+            check(transferred < len(PAGE), f"{path} 應該量到壓縮後大小")
+            check(charset == "utf-8", (path, charset))
+
+        site_adapters.SOURCE_STATE.clear()
+        result = check_stock(base + "/big5")
+        check(result["in_stock"] is False, "Big5 頁面的「缺貨」沒被讀到")
+        check(result["bytes"] == len(BIG5_PAGE), result)
+
+        for path in ("/br", "/forbidden"):
+            try:
+                http_fetch("html", base + path)
+            except FetchError as e:
+                check(e.transferred == len(RESPONSES[path][3]), (path, e.transferred))
+            else:
+                raise AssertionError(f"{path} 應該要 FetchError")
+    finally:
+        server.shutdown()
+    return "gzip / deflate(chunked) / Big5 charset / br / 403"
+
+
+# ------------------------------------------------------
+# 斷路器：API 一直失敗就停用，冷卻結束再試
+# ------------------------------------------------------
+def check_source_cooldown():
+    site_adapters.SOURCE_STATE.clear()
+    calls = []
+
+    def fetch(source, url):
+        calls.append(source)
+        if source == "costco_api":
+            raise FetchError("HTTP 403", 100)
+        return b"<p>ok</p>", 9, None
+
+    n = site_adapters.SOURCE_MAX_FAILURES
+    for _ in range(n + 2):
+        result = check_stock(COSTCO_URL, fetch=fetch)
+    check(calls == ["costco_api", "html"] * n + ["html", "html"], calls)
+    check(result["disabled"] == ["costco_api"] and result["bytes"] == 9, result)
+
+    # 模擬冷卻結束：會再試一次 API
+    site_adapters.SOURCE_STATE[("costco_tw", "costco_api")]["disabled_until"] = 1
+    calls.clear()
+    check_stock(COSTCO_URL, fetch=fetch)
+    check(calls == ["costco_api", "html"], calls)
+    return f"連續失敗 {n} 次後停用、冷卻後重試"
+
+
+if __name__ == "__main__":
+    site_adapters.set_logger(lambda msg: None)
+
+    checks = [(case[0], lambda case=case: run_case(*case)) for case in CASES]
+    checks += [
+        ("decode_body", check_decode_body),
+        ("http_fetch", check_http_fetch),
+        ("cooldown", check_source_cooldown),
+    ]
+
+    failed = 0
+    for name, func in checks:
+        try:
+            print(f"✅ {name}: {func()}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+
+    print(f"\n{len(checks) - failed}/{len(checks)} 通過")
+    sys.exit(1 if failed else 0)
@@ -1,14 +1,14 @@
 import os
 import time
 import json
-import requests
-from bs4 import BeautifulSoup
 from linebot import LineBotApi
 from linebot.models import TextSendMessage
 from datetime import datetime
 from dotenv import load_dotenv
 from filelock import FileLock
 
+from site_adapters import check_stock, format_result, set_logger, stats_summary
+
 MONITOR_FILE = "monitors.json"
 USERS_FILE = "users.json"
 
@@ -18,6 +18,9 @@ line_bot_api = LineBotApi(os.getenv("LINE_CHANNEL_ACCESS_TOKEN"))
 LOG_FOLDER = "logs"
 os.makedirs(LOG_FOLDER, exist_ok=True)
 
+# 每隔多久把各站 adapter 的累計流量 / parse 時間寫進日誌（秒）
+STATS_LOG_INTERVAL = 3600
+
 
 # ------------------------------------------------------
 # 基本 JSON 工具（不加鎖）
@@ -69,24 +72,18 @@ def log(msg: str):
     print(msg)
 
 
+# adapter 停用 / 重新啟用的訊息也寫進日誌
+set_logger(log)
+
+
 # ------------------------------------------------------
 # 共用工具
 # ------------------------------------------------------
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-}
-
-
 def is_in_stock(url: str) -> bool:
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        return "缺貨" not in soup.get_text()
+        result = check_stock(url)
+        log(f"📊 {format_result(result)}")
+        return result["in_stock"]
     except Exception as e:
         log(f"⚠️ {url} 網路錯誤: {e}")
         return False
@@ -113,6 +110,7 @@ def calc_alive(m: dict, now_ts: float) -> bool:
 # ------------------------------------------------------
 def main():
     log("📡 監控程式啟動")
+    last_stats_ts = time.time()
 
     while True:
         # 先拿 snapshot，避免在持有 lock 時做網路 I/O
@@ -162,8 +160,21 @@ def main():
 
         update_monitors(mut)
 
+        if now_ts - last_stats_ts >= STATS_LOG_INTERVAL:
+            log_stats()
+            last_stats_ts = now_ts
+
         time.sleep(1)
 
 
+def log_stats():
+    summary = stats_summary()
+    if summary:
+        log(f"📊 adapter 統計：\n{summary}")
+
+
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        log_stats()
@@ -2,9 +2,10 @@ import os
 import time
 import json
 import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+from site_adapters import check_stock, format_result, stats_summary
+
 # 讀取 .env
 load_dotenv()
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -16,6 +17,9 @@ PRODUCT_URL = "https://www.costco.com.tw/Digital-Mobile/Mobile-Tablets/iPhone-Mo
 # 每幾秒檢查一次（180 秒 = 3 分鐘）
 CHECK_INTERVAL_SECONDS = 180
 
+# 每隔多久印一次各站 adapter 的累計流量 / parse 時間（秒）
+STATS_LOG_INTERVAL = 3600
+
 
 def save_status(in_stock: bool):
     data = {
@@ -28,24 +32,14 @@ def save_status(in_stock: bool):
 
 def is_in_stock() -> bool:
     """檢查 Costco 是否有貨：有回 True，沒有回 False"""
-
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
-    }
-
     try:
-        resp = requests.get(PRODUCT_URL, headers=headers, timeout=10)
-        resp.raise_for_status()
+        result = check_stock(PRODUCT_URL)
     except Exception as e:
         print("⚠️ 網路錯誤:", e)
         return False
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    return "缺貨" not in soup.get_text()
+    print("📊", format_result(result))
+    return result["in_stock"]
 
 
 def send_tg_message(text: str):
@@ -69,6 +63,7 @@ def main():
     print("商品網址:", PRODUCT_URL)
 
     last_in_stock = None
+    last_stats_ts = time.time()
 
     while True:
         try:
@@ -87,8 +82,21 @@ def main():
         except Exception as e:
             print("⚠️ 發生錯誤：", e)
 
+        if time.time() - last_stats_ts >= STATS_LOG_INTERVAL:
+            print_stats()
+            last_stats_ts = time.time()
+
         time.sleep(CHECK_INTERVAL_SECONDS)
 
 
+def print_stats():
+    summary = stats_summary()
+    if summary:
+        print("📊 adapter 統計：\n" + summary)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        print_stats()
\ No newline at end of file
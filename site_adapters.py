@@ -0,0 +1,437 @@
+import os
+import re
+import json
+import glob
+import time
+import zlib
+import threading
+import copy
+import codecs
+import requests
+from bs4 import BeautifulSoup
+from urllib.parse import urlparse
+
+
+# ------------------------------------------------------
+# 站點 adapter：依 host 選擇最小的結構化資料來源判斷庫存
+#
+# 每個 adapter 是一串 source（由小到大），每個 source：
+#   - name:  來源名稱（也是 fixture 檔名前綴）
+#   - url:   product_url -> 要抓的網址（回 None 表示不適用）
+#   - parse: (bytes, charset) -> True / False / None（None = 判斷不出來，換下一個）
+# 最後一個 source 一律是原本的 HTML「缺貨」字串判斷。
+# ------------------------------------------------------
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+
+# 固定只收 gzip / deflate，才能自己解壓、也讓每次量到的大小可以互相比較
+FETCH_HEADERS = dict(HEADERS, **{"Accept-Encoding": "gzip, deflate"})
+
+
+class FetchError(Exception):
+    """抓取失敗，但仍帶著已經傳輸的位元組數"""
+
+    def __init__(self, msg: str, transferred: int = 0):
+        super().__init__(msg)
+        self.transferred = transferred
+
+
+def decode_body(raw: bytes, encoding: str | None) -> bytes:
+    """
+    依 Content-Encoding 解壓（可疊加，例如 "gzip, gzip"，照相反順序解）
+    不認得的編碼（br ...）直接丟 ValueError，不要把壓縮過的 bytes 當 HTML 判斷
+    """
+    codings = [c.strip().lower() for c in (encoding or "").split(",") if c.strip()]
+    for coding in reversed(codings):
+        if coding in ("gzip", "x-gzip"):
+            raw = zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+        elif coding == "deflate":
+            try:
+                raw = zlib.decompress(raw)
+            except zlib.error:
+                raw = zlib.decompress(raw, -zlib.MAX_WBITS)
+        elif coding != "identity":
+            raise ValueError(f"不支援的 Content-Encoding：{encoding}")
+    return raw
+
+
+CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+
+
+def http_fetch(source: str, url: str):
+    """
+    實際發 HTTP 請求，回傳 (body, 傳輸位元組數, Content-Type 宣告的 charset 或 None)
+    位元組數一律是線上收到的 body 原始大小（壓縮後、不含 header），
+    錯誤回應（403 / 404 ...）也會把 body 讀完並算進去。
+    """
+    transferred = 0
+    try:
+        resp = requests.get(url, headers=FETCH_HEADERS, timeout=10, stream=True)
+        with resp:
+            chunks = []
+            for chunk in resp.raw.stream(64 * 1024, decode_content=False):
+                chunks.append(chunk)
+                transferred += len(chunk)
+            body = decode_body(b"".join(chunks), resp.headers.get("Content-Encoding"))
+    except Exception as e:
+        raise FetchError(str(e), transferred) from e
+
+    if not resp.ok:
+        raise FetchError(f"HTTP {resp.status_code}", transferred)
+
+    match = CHARSET_RE.search(resp.headers.get("Content-Type", ""))
+    return body, transferred, match.group(1) if match else None
+
+
+def fixture_fetcher(fixture_dir: str):
+    """
+    回傳一個從錄好的檔案讀資料的 fetch（檔名：<source>.*，位元組數 = 檔案大小）
+    fixture 沒有 header，charset 一律 None，靠頁面裡的 <meta charset> 判斷
+    """
+    def fetch(source: str, url: str):
+        matches = sorted(glob.glob(os.path.join(fixture_dir, source + ".*")))
+        if not matches:
+            raise FetchError(f"找不到 fixture：{source}.*")
+        with open(matches[0], "rb") as f:
+            body = f.read()
+        return body, len(body), None
+    return fetch
+
+
+# ------------------------------------------------------
+# 共用 parser
+# ------------------------------------------------------
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+
+def decode_html(body: bytes, charset: str | None) -> str:
+    """
+    依序用 Content-Type 的 charset、頁面 <meta charset>、最後才用 UTF-8 解碼
+    （直接丟 bytes 給 BeautifulSoup 會用猜的，純中文頁面常猜錯）
+    """
+    if not charset:
+        match = META_CHARSET_RE.search(body[:8192])
+        if match:
+            charset = match.group(1).decode("ascii")
+    charset = charset or "utf-8"
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+    return body.decode(charset, errors="replace")
+
+
+def parse_html_text(body: bytes, charset: str | None = None):
+    """原本的判斷方式：整頁文字沒有「缺貨」就算有貨"""
+    soup = BeautifulSoup(decode_html(body, charset), "html.parser")
+    return "缺貨" not in soup.get_text()
+
+
+LD_JSON_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.S | re.I,
+)
+
+# 只有確定線上買得到才算有貨；InStoreOnly / PreOrder 等其他值都當作不確定，
+# 交給整頁文字判斷，避免誤發補貨通知
+IN_STOCK_VALUES = {"instock", "limitedavailability"}
+OUT_OF_STOCK_VALUES = {"outofstock", "soldout", "discontinued"}
+
+
+def _find_availability(node):
+    if isinstance(node, list):
+        for item in node:
+            found = _find_availability(item)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        value = node.get("availability")
+        if isinstance(value, str):
+            return value
+        for key in ("offers", "@graph", "mainEntity"):
+            if key in node:
+                found = _find_availability(node[key])
+                if found is not None:
+                    return found
+    return None
+
+
+def parse_json_ld(body: bytes, charset: str | None = None):
+    """從 <script type="application/ld+json"> 找 offers.availability"""
+    for block in LD_JSON_RE.findall(decode_html(body, charset)):
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        availability = _find_availability(data)
+        if availability is None:
+            continue
+        # "http://schema.org/InStock" -> "instock"
+        value = availability.rsplit("/", 1)[-1].lower()
+        if value in IN_STOCK_VALUES:
+            return True
+        if value in OUT_OF_STOCK_VALUES:
+            return False
+    return None
+
+
+# ------------------------------------------------------
+# Costco 台灣（SAP Commerce / OCC API）
+# ------------------------------------------------------
+COSTCO_CODE_RE = re.compile(r"/p/(\w+)")
+
+
+def costco_api_url(product_url: str):
+    match = COSTCO_CODE_RE.search(urlparse(product_url).path)
+    if not match:
+        return None
+    return (
+        "https://www.costco.com.tw/rest/v2/taiwan/products/"
+        f"{match.group(1)}?fields=code,stock(DEFAULT)&lang=zh_TW&curr=TWD"
+    )
+
+
+def parse_costco_api(body: bytes, charset: str | None = None):
+    """stock.stockLevelStatus：inStock / lowStock / outOfStock"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    stock = data.get("stock")
+    if not isinstance(stock, dict):
+        return None
+    status = stock.get("stockLevelStatus")
+    if status in ("inStock", "lowStock"):
+        return True
+    if status == "outOfStock":
+        return False
+    return None
+
+
+def parse_costco_html(body: bytes, charset: str | None = None):
+    """同一份 HTML：先看 JSON-LD，沒有才掃整頁文字"""
+    found = parse_json_ld(body, charset)
+    if found is not None:
+        return found
+    return parse_html_text(body, charset)
+
+
+HTML_SOURCE = {"name": "html", "url": lambda u: u, "parse": parse_html_text}
+
+ADAPTERS = {
+    "costco.com.tw": {
+        "name": "costco_tw",
+        "sources": [
+            {"name": "costco_api", "url": costco_api_url, "parse": parse_costco_api},
+            dict(HTML_SOURCE, parse=parse_costco_html),
+        ],
+    },
+}
+
+DEFAULT_ADAPTER = {"name": "generic", "sources": [HTML_SOURCE]}
+
+
+def get_adapter(url: str) -> dict:
+    """依註冊網域比對，子網域（www. / m. ...）都算同一個站"""
+    host = (urlparse(url).hostname or "").lower()
+    for domain, adapter in ADAPTERS.items():
+        if host == domain or host.endswith("." + domain):
+            return adapter
+    return DEFAULT_ADAPTER
+
+
+# ------------------------------------------------------
+# 統計：每個 adapter 的次數 / 傳輸量 / parse 時間
+# ------------------------------------------------------
+STATS = {}
+# bot_server 會在多個 request thread 裡同時檢查
+_stats_lock = threading.Lock()
+
+
+def record_stats(result: dict):
+    with _stats_lock:
+        _record_stats(result)
+
+
+def _record_stats(result: dict):
+    s = STATS.setdefault(
+        result["adapter"],
+        {
+            "checks": 0, "bytes": 0, "parse_ms": 0.0,
+            "sources": {}, "failed": {}, "disabled": {},
+        },
+    )
+    s["checks"] += 1
+    s["bytes"] += result["bytes"]
+    s["parse_ms"] += result["parse_ms"]
+    if result["source"]:
+        s["sources"][result["source"]] = s["sources"].get(result["source"], 0) + 1
+    for a in result["attempts"]:
+        if a["error"]:
+            s["failed"][a["source"]] = s["failed"].get(a["source"], 0) + 1
+    for name in result["disabled"]:
+        s["disabled"][name] = s["disabled"].get(name, 0) + 1
+
+
+def stats_summary() -> str:
+    with _stats_lock:
+        snapshot = copy.deepcopy(STATS)
+    lines = []
+    for name, s in snapshot.items():
+        n = s["checks"] or 1
+        lines.append(
+            f"{name}: {s['checks']} 次，平均 {s['bytes'] / n / 1024:.1f} KB、"
+            f"parse {s['parse_ms'] / n:.1f} ms，來源 {s['sources']}，"
+            f"失敗 {s['failed']}，停用略過 {s['disabled']}"
+        )
+    return "\n".join(lines)
+
+
+def format_result(result: dict) -> str:
+    text = (
+        f"[{result['adapter']}/{result['source']}] "
+        f"{result['bytes'] / 1024:.1f} KB, parse {result['parse_ms']:.1f} ms"
+    )
+    skipped = [
+        f"{a['source']}: {a['error']} ({a['bytes'] / 1024:.1f} KB)"
+        for a in result["attempts"] if a["error"]
+    ]
+    skipped += [f"{name}: 停用中" for name in result.get("disabled", [])]
+    if skipped:
+        text += "（略過 " + "；".join(skipped) + "）"
+    return text
+
+
+# ------------------------------------------------------
+# fast path 斷路器：同一個來源連續失敗 N 次就先停用一段時間，
+# 避免 API 被擋時每次檢查都多打一次 Costco 又白白多傳資料
+# ------------------------------------------------------
+SOURCE_MAX_FAILURES = 3
+SOURCE_COOLDOWN_SECONDS = 1800
+
+SOURCE_STATE = {}  # (adapter, source) -> {failures, disabled_until}
+_source_lock = threading.Lock()
+
+# 停用 / 重新啟用時的訊息輸出，呼叫端可以換成自己的 log()
+log = print
+
+
+def set_logger(func):
+    global log
+    log = func
+
+
+def source_enabled(adapter_name: str, source_name: str, now: float) -> bool:
+    with _source_lock:
+        state = SOURCE_STATE.get((adapter_name, source_name))
+        if not state or not state["disabled_until"]:
+            return True
+        if now < state["disabled_until"]:
+            return False
+        state["disabled_until"] = 0
+    log(f"🔁 {adapter_name}/{source_name} 冷卻結束，重新啟用")
+    return True
+
+
+def mark_source(adapter_name: str, source_name: str, ok: bool, now: float):
+    """成功就歸零；連續失敗達上限就停用（冷卻後再失敗一次會直接再停用）"""
+    with _source_lock:
+        state = SOURCE_STATE.setdefault(
+            (adapter_name, source_name), {"failures": 0, "disabled_until": 0}
+        )
+        if ok:
+            state["failures"] = 0
+            return
+        state["failures"] += 1
+        if state["failures"] < SOURCE_MAX_FAILURES:
+            return
+        state["disabled_until"] = now + SOURCE_COOLDOWN_SECONDS
+        failures = state["failures"]
+    log(
+        f"⛔ {adapter_name}/{source_name} 連續失敗 {failures} 次，"
+        f"停用 {SOURCE_COOLDOWN_SECONDS} 秒"
+    )
+
+
+# ------------------------------------------------------
+# 主要入口
+# ------------------------------------------------------
+def check_stock(url: str, fetch=http_fetch) -> dict:
+    """
+    依序嘗試 adapter 的來源，回傳
+    {in_stock, adapter, source, bytes, parse_ms, attempts, disabled}
+    attempts 是每個來源的 {source, bytes, parse_ms, error}，
+    disabled 是這次因為冷卻中而沒有嘗試的來源，
+    bytes / parse_ms 是這次檢查所有嘗試（含失敗的）的總和。
+    最後一個來源（HTML）失敗時直接丟出例外，交給呼叫端處理。
+    """
+    adapter = get_adapter(url)
+    sources = adapter["sources"]
+    attempts = []
+    disabled = []
+    now = time.time()
+
+    def make_result(in_stock, source_name):
+        return {
+            "in_stock": in_stock,
+            "adapter": adapter["name"],
+            "source": source_name,
+            "bytes": sum(a["bytes"] for a in attempts),
+            "parse_ms": sum(a["parse_ms"] for a in attempts),
+            "attempts": attempts,
+            "disabled": disabled,
+        }
+
+    for i, source in enumerate(sources):
+        is_last = i == len(sources) - 1
+        source_url = source["url"](url)
+        if source_url is None:
+            continue
+        # 最後一個（HTML）是保底，不套用斷路器
+        if not is_last and not source_enabled(adapter["name"], source["name"], now):
+            disabled.append(source["name"])
+            continue
+
+        attempt = {"source": source["name"], "bytes": 0, "parse_ms": 0.0, "error": None}
+        attempts.append(attempt)
+
+        try:
+            body, attempt["bytes"], charset = fetch(source["name"], source_url)
+
+            start = time.perf_counter()
+            try:
+                in_stock = source["parse"](body, charset)
+            finally:
+                attempt["parse_ms"] = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            # fast path 壞掉（抓不到 / 解析失敗）就換下一個來源
+            attempt["bytes"] += getattr(e, "transferred", 0)
+            attempt["error"] = str(e) or type(e).__name__
+            if is_last:
+                record_stats(make_result(None, None))
+                raise
+            mark_source(adapter["name"], source["name"], False, now)
+            continue
+
+        if in_stock is None and not is_last:
+            attempt["error"] = "無法判斷"
+            mark_source(adapter["name"], source["name"], False, now)
+            continue
+
+        if not is_last:
+            mark_source(adapter["name"], source["name"], True, now)
+
+        result = make_result(bool(in_stock), source["name"])
+        record_stats(result)
+        return result
+
+    raise RuntimeError(f"{adapter['name']} 沒有可用的資料來源：{url}")
+